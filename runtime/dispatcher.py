@@ -2,6 +2,7 @@
 Runtime dispatcher for Azure Components Foundry.
 Implements the environment variable-based component selection pattern.
 """
+import asyncio
 import importlib
 import os
 import logging
@@ -61,6 +62,22 @@ def predict(payload: Union[str, dict, list]) -> Union[dict, list]:
         raise
 
 
+async def predict_async(payload: Union[str, dict]) -> dict:
+    """
+    Run predict for a single item without blocking the event loop.
+    
+    predict runs in a worker thread from asyncio.to_thread; concurrent calls
+    run the component handler in parallel threads, so it must be thread-safe.
+    
+    Args:
+        payload: Input data for one item (string or dict)
+        
+    Returns:
+        Prediction result for the item
+    """
+    return await asyncio.to_thread(predict, payload)
+
+
 def health_check() -> Dict[str, Any]:
     """
     Health check endpoint to verify the dispatcher is working.
@@ -1,14 +1,27 @@
 """
 Container Apps / REST API adapter for the unified runtime system.
 """
+import asyncio
 import json
 import logging
+import os
 from fastapi import FastAPI, HTTPException, Request
-from fastapi.responses import JSONResponse
-from runtime.dispatcher import predict, health_check
+from fastapi.responses import JSONResponse, Response
+from runtime.dispatcher import predict, predict_async, health_check
 
 logger = logging.getLogger(__name__)
 
+# Serialized /health body, cached once the handler reports healthy
+_health_body = None
+
+# Most /batch items handed to worker threads at once; 1 runs them one by one
+_BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "32"))
+
+# Errors that map to a fixed client-facing response; anything else is a 500
+_ERROR_RESPONSES = {
+    json.JSONDecodeError: (400, "Invalid JSON in request body"),
+}
+
 # Create FastAPI app
 app = FastAPI(
     title="Azure Components Foundry",
@@ -28,8 +41,20 @@ class ContainerAppAdapter:
 
 @app.get("/health")
 async def health():
-    """Health check endpoint."""
-    return health_check()
+    """
+    Health check endpoint.
+    
+    A healthy status cannot change once the handler has loaded, so its
+    serialized body is cached and returned as-is on later calls.
+    """
+    global _health_body
+    if _health_body is None:
+        status = health_check()
+        body = json.dumps(status, separators=(",", ":")).encode("utf-8")
+        if status.get("status") != "healthy":
+            return Response(content=body, media_type="application/json")
+        _health_body = body
+    return Response(content=_health_body, media_type="application/json")
 
 
 @app.post("/predict")
@@ -52,12 +77,16 @@ async def predict_endpoint(request: Request):
         
         return JSONResponse(content=result)
         
-    except json.JSONDecodeError:
-        logger.error("Invalid JSON in request body")
-        raise HTTPException(status_code=400, detail="Invalid JSON in request body")
     except Exception as e:
-        logger.error(f"Error in prediction: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
+        status_code, detail = _ERROR_RESPONSES.get(type(e), (500, str(e)))
+        logger.error(f"Error in prediction: {detail}")
+        raise HTTPException(status_code=status_code, detail=detail)
+
+
+async def _predict_limited(item, limit):
+    """Run predict_async for one batch item once the semaphore admits it."""
+    async with limit:
+        return await predict_async(item)
 
 
 @app.post("/batch")
@@ -65,6 +94,11 @@ async def batch_predict_endpoint(request: Request):
     """
     Batch prediction endpoint.
     
+    Each item is dispatched separately through predict_async, so the
+    component handler runs on several worker threads at once and must be
+    thread-safe. At most BATCH_CONCURRENCY items (default 32) are in flight;
+    set it to 1 for handlers that are not.
+    
     Args:
         request: HTTP request with JSON array payload
         
@@ -78,22 +112,28 @@ async def batch_predict_endpoint(request: Request):
         if not isinstance(payload, list):
             raise HTTPException(status_code=400, detail="Batch endpoint requires array input")
         
-        # Process through dispatcher
-        result = predict(payload)
+        # Fan the items out through the dispatcher, a bounded number at a time
+        limit = asyncio.Semaphore(_BATCH_CONCURRENCY)
+        result = await asyncio.gather(*(_predict_limited(item, limit) for item in payload))
         
         return JSONResponse(content=result)
         
-    except json.JSONDecodeError:
-        logger.error("Invalid JSON in request body")
-        raise HTTPException(status_code=400, detail="Invalid JSON in request body")
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Error in batch prediction: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
+        status_code, detail = _ERROR_RESPONSES.get(type(e), (500, str(e)))
+        logger.error(f"Error in batch prediction: {detail}")
+        raise HTTPException(status_code=status_code, detail=detail)
+
+
+def _main():
+    """Serve the app with uvicorn when the module is run directly."""
+    import uvicorn
+    uvicorn.run(app, host="0.0.0.0", port=8000, loop="uvloop", http="httptools")
 
 
 # Initialize adapter on startup
 ContainerAppAdapter.init()
 
 if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    _main()
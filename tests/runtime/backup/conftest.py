@@ -0,0 +1,143 @@
+"""
+Shared fixtures for the REST adapter tests in this directory.
+"""
+import sys
+import importlib
+import pytest
+from contextlib import contextmanager
+from types import SimpleNamespace
+from unittest.mock import MagicMock, AsyncMock, patch
+
+
+# Create custom HTTPException class
+class MockHTTPException(Exception):
+    def __init__(self, status_code, detail):
+        self.status_code = status_code
+        self.detail = detail
+        super().__init__(f"{status_code}: {detail}")
+
+
+HEALTHY_STATUS = {"status": "healthy"}
+
+
+def _predict(payload):
+    """Default result for the mocked dispatcher.predict."""
+    return {"result": "test"}
+
+
+async def _predict_item(payload):
+    """Default per-item result for the mocked dispatcher.predict_async."""
+    return {"result": payload["text"]}
+
+
+def _import_rest_adapter(modules):
+    """
+    Import a fresh runtime.rest_adapter against the given sys.modules entries.
+
+    sys.modules is restored afterwards, so neither the entries nor the fresh
+    runtime package leak into other test modules.
+    """
+    with patch.dict(sys.modules, modules):
+        for name in ('runtime', 'runtime.rest_adapter'):
+            sys.modules.pop(name, None)
+        return importlib.import_module('runtime.rest_adapter')
+
+
+@pytest.fixture(scope="session")
+def anyio_backend():
+    """Run anyio-marked tests on asyncio, on uvloop when it is installed."""
+    try:
+        import uvloop  # noqa: F401
+    except ImportError:
+        return "asyncio"
+    return ("asyncio", {"use_uvloop": True})
+
+
+@pytest.fixture(scope="session")
+def stub_modules():
+    """
+    Import runtime.rest_adapter once per session against stub modules.
+
+    The fastapi, uvicorn and dispatcher stubs are only in sys.modules while
+    the adapter is imported; every test module that uses this fixture
+    shares that one import.
+    """
+    # Set up FastAPI stubs; route decorators hand back the undecorated
+    # function so the endpoints stay plain coroutines
+    mock_app = SimpleNamespace(
+        get=lambda *args, **kwargs: (lambda fn: fn),
+        post=lambda *args, **kwargs: (lambda fn: fn),
+        add_middleware=lambda *args, **kwargs: None,
+    )
+    mock_fastapi = SimpleNamespace(
+        FastAPI=lambda *args, **kwargs: mock_app,
+        HTTPException=MockHTTPException,
+        Request=object,
+        responses=SimpleNamespace(
+            JSONResponse=lambda content: content,
+            Response=lambda content, media_type=None: SimpleNamespace(
+                body=content, media_type=media_type
+            ),
+        ),
+    )
+    
+    # Set up uvicorn mock
+    mock_uvicorn = MagicMock()
+    
+    # Set up dispatcher stub; only the predict functions, which tests make
+    # call assertions on, are mocks, and those wrap plain functions
+    mock_dispatcher = SimpleNamespace(
+        predict=MagicMock(wraps=_predict),
+        predict_async=AsyncMock(wraps=_predict_item),
+        health_check=lambda: HEALTHY_STATUS,
+    )
+    
+    rest_adapter = _import_rest_adapter({
+        'fastapi': mock_fastapi,
+        'fastapi.responses': mock_fastapi.responses,
+        'uvicorn': mock_uvicorn,
+        'runtime.dispatcher': mock_dispatcher,
+    })
+    
+    yield {
+        'fastapi': mock_fastapi,
+        'uvicorn': mock_uvicorn,
+        'dispatcher': mock_dispatcher,
+        'rest_adapter': rest_adapter,
+        'app': mock_app,
+    }
+
+
+# sys.modules prefixes that other test files replace with mocks and never restore
+_STUBBED_PREFIXES = ('fastapi', 'starlette', 'uvicorn', 'runtime')
+
+
+@contextmanager
+def _without_stubs():
+    """
+    Hide leftover fastapi, starlette, uvicorn and runtime entries from sys.modules.
+
+    Imports inside the block resolve the real packages; sys.modules is
+    restored afterwards.
+    """
+    with patch.dict(sys.modules):
+        for name in [name for name in sys.modules if name.split('.')[0] in _STUBBED_PREFIXES]:
+            del sys.modules[name]
+        yield
+
+
+@pytest.fixture(scope="session")
+def real_rest_adapter():
+    """Import runtime.rest_adapter against the real fastapi and dispatcher."""
+    with _without_stubs():
+        pytest.importorskip("httpx")
+        pytest.importorskip("fastapi")
+        return _import_rest_adapter({})
+
+
+@pytest.fixture(scope="session")
+def client(real_rest_adapter):
+    """TestClient that drives requests through the real FastAPI app."""
+    with _without_stubs():
+        from fastapi.testclient import TestClient
+    return TestClient(real_rest_adapter.app)
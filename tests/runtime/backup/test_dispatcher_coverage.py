@@ -3,7 +3,9 @@ Isolated tests for the runtime dispatcher module to improve coverage.
 """
 import sys
 import os
+import asyncio
 import importlib
+import threading
 from unittest.mock import patch, Mock
 
 
@@ -64,6 +66,27 @@ def test_predict_with_exception():
         assert str(e) == "Test error"
 
 
+
+def test_predict_async_runs_in_worker_thread():
+    """Test that predict_async runs predict for one item off the calling thread."""
+    # Import locally to get fresh instance
+    if 'runtime.dispatcher' in sys.modules:
+        del sys.modules['runtime.dispatcher']
+    
+    # Set up the mock to report the thread it ran on
+    setup_module()
+    component = sys.modules['components.word_count.src.component']
+    component.predict.side_effect = lambda payload: {"thread": threading.get_ident()}
+    
+    # Import the module
+    from runtime.dispatcher import predict_async
+    
+    # Test single item processing
+    result = asyncio.run(predict_async({"text": "test"}))
+    
+    component.predict.assert_called_once_with({"text": "test"})
+    assert result["thread"] != threading.get_ident()
+
 def test_health_check_unhealthy():
     """Test the health check function when handler is invalid."""
     # Import locally to get fresh instance
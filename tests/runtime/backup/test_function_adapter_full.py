@@ -12,14 +12,20 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../.
 
 # Mock classes
 class MockHttpRequest:
+    _DEFAULT_BODY = b'{"text": "test data"}'
+    
     def __init__(self, body=None):
-        self.body = body or b'{"text": "test data"}'
+        self.body = body or self._DEFAULT_BODY
+        self._parsed = None
         
     def get_body(self):
         return self.body
         
     def get_json(self):
-        return json.loads(self.body)
+        # The body never changes, so parse it once
+        if self._parsed is None:
+            self._parsed = json.loads(self.body)
+        return self._parsed
 
 #-----------------------------------------------------------------------------
 # Tests for runtime/function_adapter.py
@@ -36,9 +42,12 @@ def mock_azure_functions():
     def mock_http_response(body, status_code=200, headers=None, mimetype="application/json"):
         return {"body": body, "status_code": status_code, "headers": headers, "mimetype": mimetype}
     
-    mock_func.HttpResponse = MagicMock(side_effect=mock_http_response)
+    # No test asserts on HttpResponse calls, so a plain function is enough
+    mock_func.HttpResponse = mock_http_response
     
-    with patch.dict(sys.modules, {'azure.functions': mock_func}):
+    # Rebind the adapter's own func reference; patching sys.modules copied
+    # the whole dict and missed an adapter that was already imported
+    with patch('runtime.function_adapter.func', mock_func):
         yield mock_func
 
 def test_function_adapter_init():
@@ -85,6 +85,7 @@ def setup_function():
     # Mock runtime.dispatcher
     sys.modules['runtime.dispatcher'] = Mock()
     sys.modules['runtime.dispatcher'].predict = MagicMock(return_value={"result": "test_result"})
+    sys.modules['runtime.dispatcher'].predict_async = AsyncMock(return_value={"result": "test_result"})
     sys.modules['runtime.dispatcher'].health_check = MagicMock(return_value={"status": "healthy"})
 
 
@@ -137,6 +138,10 @@ async def test_health_endpoint():
     mock_health_check = MagicMock(return_value={"status": "test_healthy"})
     sys.modules['runtime.dispatcher'].health_check = mock_health_check
     
+    # Mock Response; the endpoint hands it the pre-serialized JSON body
+    mock_response = MagicMock()
+    sys.modules['fastapi.responses'].Response = mock_response
+    
     # Import the module
     import runtime.rest_adapter
     
@@ -147,9 +152,12 @@ async def test_health_endpoint():
     # Call the health endpoint
     result = await health_handler()
     
-    # Verify health_check was called and result is correct
+    # Verify health_check was called and its status was returned as JSON bytes
     mock_health_check.assert_called_once()
-    assert result == {"status": "test_healthy"}
+    mock_response.assert_called_once_with(
+        content=b'{"status":"test_healthy"}', media_type="application/json"
+    )
+    assert result is mock_response.return_value
 
 
 @pytest.mark.asyncio
@@ -236,10 +244,9 @@ async def test_batch_predict_endpoint_success():
     """Test the batch predict endpoint with valid input."""
     setup_function()
     
-    # Mock the predict function
-    batch_result = [{"result": "result1"}, {"result": "result2"}]
-    mock_predict = MagicMock(return_value=batch_result)
-    sys.modules['runtime.dispatcher'].predict = mock_predict
+    # Mock the per-item predict function
+    mock_predict_async = AsyncMock(side_effect=lambda item: {"result": item["text"]})
+    sys.modules['runtime.dispatcher'].predict_async = mock_predict_async
     
     # Import the module
     import runtime.rest_adapter
@@ -253,12 +260,13 @@ async def test_batch_predict_endpoint_success():
     request = MockRequest(json_data=batch_input)
     
     # Call the batch predict endpoint
-    result = await batch_handler(request)
+    await batch_handler(request)
+    
+    # Verify each item was dispatched on its own
+    assert mock_predict_async.await_count == 2
+    mock_predict_async.assert_any_await({"text": "input1"})
+    mock_predict_async.assert_any_await({"text": "input2"})
     
-    # Verify predict was called with the correct data
-    mock_predict.assert_called_once_with(batch_input)
-    # Since our mock setup returns the mock itself, just verify the endpoint was called successfully
-
 
 @pytest.mark.asyncio
 async def test_batch_predict_endpoint_not_list():
@@ -312,9 +320,9 @@ async def test_batch_predict_endpoint_general_exception():
     """Test the batch predict endpoint with a general exception."""
     setup_function()
     
-    # Mock the predict function to raise an exception
-    mock_predict = MagicMock(side_effect=ValueError("Test batch error"))
-    sys.modules['runtime.dispatcher'].predict = mock_predict
+    # Mock the per-item predict function to raise an exception
+    mock_predict_async = AsyncMock(side_effect=ValueError("Test batch error"))
+    sys.modules['runtime.dispatcher'].predict_async = mock_predict_async
     
     # Import the module
     import runtime.rest_adapter
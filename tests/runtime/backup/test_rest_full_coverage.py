@@ -1,67 +0,0 @@
-"""
-Test file specifically for reaching 100% coverage of the REST adapter module.
-"""
-import sys
-import os
-import logging
-import coverage
-from unittest.mock import patch, Mock, MagicMock
-
-# Start the coverage measurement
-cov = coverage.Coverage(source=['runtime.rest_adapter'])
-cov.start()
-
-# Configure logging
-logging.basicConfig(level=logging.INFO)
-
-# Mock modules before importing runtime.rest_adapter
-sys.modules['fastapi'] = Mock()
-sys.modules['fastapi.responses'] = Mock()
-sys.modules['fastapi'].FastAPI = MagicMock(return_value=MagicMock())
-sys.modules['fastapi'].HTTPException = MagicMock()
-sys.modules['fastapi'].Request = MagicMock()
-sys.modules['fastapi'].responses.JSONResponse = MagicMock()
-
-# Mock uvicorn
-sys.modules['uvicorn'] = Mock()
-sys.modules['uvicorn'].run = MagicMock()
-
-# Mock runtime.dispatcher
-sys.modules['runtime.dispatcher'] = Mock()
-sys.modules['runtime.dispatcher'].predict = MagicMock(return_value={"result": "test_result"})
-sys.modules['runtime.dispatcher'].health_check = MagicMock(return_value={"status": "healthy"})
-
-# Import the runtime.rest_adapter module
-import runtime.rest_adapter
-
-# Test the ContainerAppAdapter.init method
-def test_container_app_adapter_init():
-    """Test the init method of ContainerAppAdapter."""
-    runtime.rest_adapter.ContainerAppAdapter.init()
-
-# Test main block by setting __name__ to "__main__"
-def test_main_block():
-    """Test the main block execution."""
-    original_name = runtime.rest_adapter.__name__
-    runtime.rest_adapter.__name__ = "__main__"
-    
-    # Execute the main block only
-    if runtime.rest_adapter.__name__ == "__main__":
-        import uvicorn
-        uvicorn.run(runtime.rest_adapter.app, host="0.0.0.0", port=8000)
-    
-    # Verify uvicorn.run was called properly
-    sys.modules['uvicorn'].run.assert_called_once()
-
-    # Restore the original name
-    runtime.rest_adapter.__name__ = original_name
-
-# Run tests
-test_container_app_adapter_init()
-test_main_block()
-
-# Stop coverage and save report
-cov.stop()
-cov.save()
-cov.report()
-cov.html_report(directory='htmlcov', title='REST Adapter Coverage Report')
@@ -1,324 +1,277 @@
 """
 Pytest-compatible coverage solution for rest_adapter.py.
-This test file is designed to be run with pytest and will mark all lines in the module as covered.
+This test file is designed to be run with pytest; coverage is measured by
+pytest-cov (--cov=runtime.rest_adapter --cov-report=term-missing).
+
+It is the single home for the REST adapter scenarios that used to be spread
+across test_rest_full.py and test_rest_full_coverage.py.
 """
 import os
 import sys
 import json
 import asyncio
-import logging
-import importlib
-import coverage
 import pytest
-from unittest.mock import patch, MagicMock, AsyncMock
-
-# Configure logging
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger("test_rest_complete")
+from unittest.mock import patch
 
 # Add project root to path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
 
+# Keep the modules that share the session REST adapter stubs on one xdist worker
+pytestmark = pytest.mark.xdist_group(name="rest_adapter")
+
 # Define request mock classes
+_JSON_ERR = json.JSONDecodeError("Invalid JSON", "", 0)
+
 class MockRequest:
     """Request that returns valid JSON."""
+    _PAYLOAD = {"text": "test data"}
     async def json(self):
-        return {"text": "test data"}
+        return self._PAYLOAD
 
 class MockJSONErrorRequest:
     """Request that raises JSONDecodeError."""
     async def json(self):
-        raise json.JSONDecodeError("Invalid JSON", "", 0)
+        raise _JSON_ERR.with_traceback(None)
 
 class MockBatchRequest:
     """Request that returns a list."""
+    _PAYLOAD = [{"text": "item1"}, {"text": "item2"}]
     async def json(self):
-        return [{"text": "item1"}, {"text": "item2"}]
+        return self._PAYLOAD
 
 class MockNonListRequest:
     """Request that returns a non-list."""
+    _PAYLOAD = {"not": "a list"}
     async def json(self):
-        return {"not": "a list"}
+        return self._PAYLOAD
+
+# Shared request instances; the mocks hold no per-test state
+MOCK_REQ = MockRequest()
+MOCK_JSON_ERR = MockJSONErrorRequest()
+MOCK_BATCH = MockBatchRequest()
+MOCK_NON_LIST = MockNonListRequest()
 
 # Setup function to mock all dependencies
 @pytest.fixture(scope="module")
-def setup_mocks():
-    """Set up all mocks for testing."""
-    # Create custom HTTPException class
-    class MockHTTPException(Exception):
-        def __init__(self, status_code, detail):
-            self.status_code = status_code
-            self.detail = detail
-            super().__init__(f"{status_code}: {detail}")
-    
-    # Set up FastAPI mocks
-    mock_fastapi = MagicMock()
-    mock_app = MagicMock()
-    mock_fastapi.FastAPI.return_value = mock_app
-    mock_fastapi.HTTPException = MockHTTPException
-    mock_fastapi.Request = MagicMock()
-    mock_fastapi.responses = MagicMock()
-    mock_fastapi.responses.JSONResponse = MagicMock(side_effect=lambda content: content)
-    
-    # Set up uvicorn mock
-    mock_uvicorn = MagicMock()
-    
-    # Set up dispatcher mock
-    mock_dispatcher = MagicMock()
-    mock_dispatcher.predict = MagicMock(return_value={"result": "test"})
-    mock_dispatcher.health_check = MagicMock(return_value={"status": "healthy"})
-    
-    # Install all the mocks
-    sys.modules['fastapi'] = mock_fastapi
-    sys.modules['fastapi.responses'] = mock_fastapi.responses
-    sys.modules['uvicorn'] = mock_uvicorn
-    sys.modules['runtime.dispatcher'] = mock_dispatcher
-    
-    # Get the rest_adapter module
-    from runtime import rest_adapter
-    
-    # Replace async methods with properly testable ones
-    async def mock_health():
-        return mock_dispatcher.health_check()
-    
-    async def mock_predict_endpoint(request):
-        try:
-            payload = await request.json()
-            result = mock_dispatcher.predict(payload)
-            return mock_fastapi.responses.JSONResponse(content=result)
-        except json.JSONDecodeError:
-            logger.error("Invalid JSON in request body")
-            raise mock_fastapi.HTTPException(status_code=400, detail="Invalid JSON in request body")
-        except Exception as e:
-            logger.error(f"Error in prediction: {str(e)}")
-            raise mock_fastapi.HTTPException(status_code=500, detail=str(e))
-    
-    async def mock_batch_predict_endpoint(request):
-        try:
-            payload = await request.json()
-            if not isinstance(payload, list):
-                raise mock_fastapi.HTTPException(status_code=400, detail="Batch endpoint requires array input")
-            result = mock_dispatcher.predict(payload)
-            return mock_fastapi.responses.JSONResponse(content=result)
-        except json.JSONDecodeError:
-            logger.error("Invalid JSON in request body")
-            raise mock_fastapi.HTTPException(status_code=400, detail="Invalid JSON in request body")
-        except mock_fastapi.HTTPException:
-            raise
-        except Exception as e:
-            logger.error(f"Error in batch prediction: {str(e)}")
-            raise mock_fastapi.HTTPException(status_code=500, detail=str(e))
-    
-    # Save original methods
-    original_health = rest_adapter.health
-    original_predict = rest_adapter.predict_endpoint
-    original_batch_predict = rest_adapter.batch_predict_endpoint
-    
-    # Replace with our mock methods
-    rest_adapter.health = mock_health
-    rest_adapter.predict_endpoint = mock_predict_endpoint
-    rest_adapter.batch_predict_endpoint = mock_batch_predict_endpoint
-    
-    # Return all the mocks and the module
-    yield {
-        'fastapi': mock_fastapi, 
-        'uvicorn': mock_uvicorn,
-        'dispatcher': mock_dispatcher,
-        'rest_adapter': rest_adapter,
-        'app': mock_app,
-        'original_health': original_health,
-        'original_predict': original_predict,
-        'original_batch_predict': original_batch_predict
+def setup_mocks(stub_modules):
+    """Hand out the session stubs and the real endpoints they were imported with."""
+    rest_adapter = stub_modules['rest_adapter']
+    return {
+        **stub_modules,
+        'original_predict': rest_adapter.predict_endpoint,
+        'original_batch_predict': rest_adapter.batch_predict_endpoint,
     }
-    
-    # Restore original methods
-    rest_adapter.health = original_health
-    rest_adapter.predict_endpoint = original_predict
-    rest_adapter.batch_predict_endpoint = original_batch_predict
+
+@pytest.fixture(autouse=True)
+def _reset_dispatcher(setup_mocks):
+    """Restore the shared dispatcher mock to its defaults after each test."""
+    yield
+    dispatcher_mock = setup_mocks['dispatcher']
+    # Drop recorded calls so they do not pile up over the session
+    dispatcher_mock.predict.reset_mock(side_effect=True)
+    dispatcher_mock.predict_async.reset_mock(side_effect=True)
+    setup_mocks['uvicorn'].reset_mock()
 
 # Tests for the ContainerAppAdapter
 def test_container_app_adapter_init(setup_mocks):
     """Test ContainerAppAdapter.init()"""
-    with patch('runtime.rest_adapter.logger') as mock_logger:
-        setup_mocks['rest_adapter'].ContainerAppAdapter.init()
+    rest_adapter = setup_mocks['rest_adapter']
+    with patch.object(rest_adapter, 'logger') as mock_logger:
+        rest_adapter.ContainerAppAdapter.init()
         mock_logger.info.assert_called_with("Initializing Container Apps adapter")
 
 # Tests for the health endpoint
-@pytest.mark.asyncio
-async def test_health_endpoint(setup_mocks):
-    """Test the health endpoint"""
-    rest_adapter = setup_mocks['rest_adapter']
-    result = await rest_adapter.health()
-    assert result == {"status": "healthy"}
+def test_health_endpoint(client):
+    """Test the health endpoint through the real FastAPI routing"""
+    response = client.get("/health")
+    
+    assert response.status_code == 200
+    assert response.json()["status"] == "healthy"
 
-# Tests for the predict endpoint
-@pytest.mark.asyncio
-async def test_predict_endpoint_success(setup_mocks):
-    """Test the predict endpoint with valid JSON"""
-    rest_adapter = setup_mocks['rest_adapter']
-    result = await rest_adapter.predict_endpoint(MockRequest())
-    assert result == {"result": "test"}
+def test_health_endpoint_caches_body(client, real_rest_adapter):
+    """Test that a healthy /health body is serialized once and reused"""
+    status = {"status": "healthy", "version": "1.0.0"}
+    with patch.object(real_rest_adapter, '_health_body', None), \
+            patch.object(real_rest_adapter, 'health_check', return_value=status) as mock_health_check:
+        first = client.get("/health")
+        second = client.get("/health")
+    
+    assert first.content == b'{"status":"healthy","version":"1.0.0"}'
+    assert second.content == first.content
+    assert first.headers["content-type"] == "application/json"
+    mock_health_check.assert_called_once()
 
-@pytest.mark.asyncio
-async def test_predict_endpoint_json_error(setup_mocks):
-    """Test the predict endpoint with invalid JSON"""
-    rest_adapter = setup_mocks['rest_adapter']
-    fastapi_mock = setup_mocks['fastapi']
+def test_health_endpoint_unhealthy_not_cached(client, real_rest_adapter):
+    """Test that an unhealthy /health body is recomputed on every call"""
+    status = {"status": "unhealthy"}
+    with patch.object(real_rest_adapter, '_health_body', None), \
+            patch.object(real_rest_adapter, 'health_check', return_value=status) as mock_health_check:
+        client.get("/health")
+        response = client.get("/health")
     
-    with pytest.raises(fastapi_mock.HTTPException) as excinfo:
-        await rest_adapter.predict_endpoint(MockJSONErrorRequest())
+    assert response.json() == status
+    assert mock_health_check.call_count == 2
+
+# Tests for the predict endpoint
+def test_predict_endpoint_success(client, real_rest_adapter):
+    """Test the predict endpoint with valid JSON through the real FastAPI routing"""
+    with patch.object(real_rest_adapter, 'predict', return_value={"result": "test"}) as mock_predict:
+        response = client.post("/predict", json={"text": "test data"})
     
-    assert excinfo.value.status_code == 400
-    assert excinfo.value.detail == "Invalid JSON in request body"
+    assert response.status_code == 200
+    assert response.json() == {"result": "test"}
+    mock_predict.assert_called_once_with({"text": "test data"})
 
-@pytest.mark.asyncio
-async def test_predict_endpoint_general_error(setup_mocks):
-    """Test the predict endpoint with a general error"""
-    rest_adapter = setup_mocks['rest_adapter']
+@pytest.mark.parametrize(
+    "path, body, expected_detail",
+    [
+        ("/predict", b"{not json", "Invalid JSON in request body"),
+        ("/batch", b"{not json", "Invalid JSON in request body"),
+        ("/batch", b'{"not": "a list"}', "Batch endpoint requires array input"),
+    ],
+    ids=("predict_json_error", "batch_json_error", "batch_not_list"),
+)
+def test_endpoint_client_errors(client, path, body, expected_detail):
+    """Test that client errors reach the caller as 400s through the real app"""
+    response = client.post(path, content=body, headers={"content-type": "application/json"})
+    
+    assert response.status_code == 400
+    assert response.json() == {"detail": expected_detail}
+
+@pytest.mark.anyio
+@pytest.mark.parametrize(
+    "mock_request, side_effect, expected_status, expected_detail",
+    [
+        (MOCK_JSON_ERR, None, 400, "Invalid JSON in request body"),
+        (MOCK_REQ, ValueError("Test error"), 500, "Test error"),
+    ],
+    ids=("json_error", "general_error"),
+)
+async def test_predict_endpoint(setup_mocks, mock_request, side_effect,
+                                expected_status, expected_detail):
+    """Test the predict endpoint error paths"""
+    predict_endpoint = setup_mocks['original_predict']
     dispatcher_mock = setup_mocks['dispatcher']
     fastapi_mock = setup_mocks['fastapi']
     
-    # Make dispatcher.predict raise an error
-    dispatcher_mock.predict.side_effect = ValueError("Test error")
+    dispatcher_mock.predict.side_effect = side_effect
+    
+    with pytest.raises(fastapi_mock.HTTPException) as excinfo:
+        await predict_endpoint(mock_request)
     
-    try:
-        with pytest.raises(fastapi_mock.HTTPException) as excinfo:
-            await rest_adapter.predict_endpoint(MockRequest())
-        
-        # Check exception details
-        assert excinfo.value.status_code == 500
-        assert excinfo.value.detail == "Test error"
-    finally:
-        # Restore the side_effect
-        dispatcher_mock.predict.side_effect = None
+    # Check exception details
+    assert excinfo.value.status_code == expected_status
+    assert excinfo.value.detail == expected_detail
 
 # Tests for the batch predict endpoint
-@pytest.mark.asyncio
-async def test_batch_predict_endpoint_success(setup_mocks):
-    """Test the batch predict endpoint with valid list input"""
-    rest_adapter = setup_mocks['rest_adapter']
+@pytest.mark.anyio
+@pytest.mark.parametrize(
+    "mock_request, side_effect, expected_status, expected_detail",
+    [
+        (MOCK_BATCH, None, None, None),
+        (MOCK_NON_LIST, None, 400, "Batch endpoint requires array input"),
+        (MOCK_JSON_ERR, None, 400, "Invalid JSON in request body"),
+        (MOCK_BATCH, ValueError("Test batch error"), 500, "Test batch error"),
+    ],
+    ids=("success", "not_list", "json_error", "general_error"),
+)
+async def test_batch_predict_endpoint(setup_mocks, mock_request, side_effect,
+                                      expected_status, expected_detail):
+    """Test the batch predict endpoint for success and each error path"""
+    batch_predict_endpoint = setup_mocks['original_batch_predict']
     dispatcher_mock = setup_mocks['dispatcher']
-    
-    try:
-        # Set up specific return value for batch endpoint
-        batch_result = [{"result": "result1"}, {"result": "result2"}]
-        dispatcher_mock.predict.return_value = batch_result
-        
-        # Call our mocked batch predict function with valid data
-        result = await rest_adapter.batch_predict_endpoint(MockBatchRequest())
-        
-        # Check results
-        assert result == batch_result
-    finally:
-        # Reset to default
-        dispatcher_mock.predict.return_value = {"result": "test"}
-
-@pytest.mark.asyncio
-async def test_batch_predict_endpoint_not_list(setup_mocks):
-    """Test the batch predict endpoint with non-list input"""
-    rest_adapter = setup_mocks['rest_adapter']
     fastapi_mock = setup_mocks['fastapi']
     
+    if side_effect is not None:
+        dispatcher_mock.predict_async.side_effect = side_effect
+    
+    if expected_status is None:
+        result = await batch_predict_endpoint(mock_request)
+        dispatcher_mock.predict_async.assert_any_await({"text": "item1"})
+        dispatcher_mock.predict_async.assert_any_await({"text": "item2"})
+        assert dispatcher_mock.predict_async.await_count == 2
+        assert result == [{"result": "item1"}, {"result": "item2"}]
+        return
+    
     with pytest.raises(fastapi_mock.HTTPException) as excinfo:
-        await rest_adapter.batch_predict_endpoint(MockNonListRequest())
+        await batch_predict_endpoint(mock_request)
     
     # Check exception details
-    assert excinfo.value.status_code == 400
-    assert excinfo.value.detail == "Batch endpoint requires array input"
+    assert excinfo.value.status_code == expected_status
+    assert excinfo.value.detail == expected_detail
 
-@pytest.mark.asyncio
-async def test_batch_predict_endpoint_json_error(setup_mocks):
-    """Test the batch predict endpoint with JSON decode error"""
-    rest_adapter = setup_mocks['rest_adapter']
-    fastapi_mock = setup_mocks['fastapi']
+@pytest.mark.anyio
+async def test_batch_predict_endpoint_concurrent(setup_mocks):
+    """Test that batch items are dispatched concurrently, not one by one"""
+    batch_predict_endpoint = setup_mocks['original_batch_predict']
+    dispatcher_mock = setup_mocks['dispatcher']
+    delay = 0.05
     
-    with pytest.raises(fastapi_mock.HTTPException) as excinfo:
-        await rest_adapter.batch_predict_endpoint(MockJSONErrorRequest())
+    async def slow_predict(payload):
+        await asyncio.sleep(delay)
+        return {"result": payload["text"]}
     
-    # Check exception details
-    assert excinfo.value.status_code == 400
-    assert excinfo.value.detail == "Invalid JSON in request body"
+    class MockLargeBatchRequest:
+        """Request that returns a larger list."""
+        async def json(self):
+            return [{"text": f"item{i}"} for i in range(5)]
+    
+    dispatcher_mock.predict_async.side_effect = slow_predict
+    
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    result = await batch_predict_endpoint(MockLargeBatchRequest())
+    elapsed = loop.time() - start
+    
+    assert dispatcher_mock.predict_async.await_count == 5
+    assert result == [{"result": f"item{i}"} for i in range(5)]
+    assert elapsed < delay * 5
 
-@pytest.mark.asyncio
-async def test_batch_predict_endpoint_general_error(setup_mocks):
-    """Test the batch predict endpoint with a general error"""
+@pytest.mark.anyio
+async def test_batch_predict_endpoint_concurrency_cap(setup_mocks):
+    """Test that no more than _BATCH_CONCURRENCY items are in flight at once"""
+    batch_predict_endpoint = setup_mocks['original_batch_predict']
     rest_adapter = setup_mocks['rest_adapter']
     dispatcher_mock = setup_mocks['dispatcher']
-    fastapi_mock = setup_mocks['fastapi']
+    in_flight = peak = 0
+    
+    async def tracked_predict(payload):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return {"result": payload["text"]}
+    
+    class MockLargeBatchRequest:
+        """Request that returns a larger list."""
+        async def json(self):
+            return [{"text": f"item{i}"} for i in range(10)]
+    
+    dispatcher_mock.predict_async.side_effect = tracked_predict
     
-    try:
-        # Make dispatcher.predict raise an error
-        dispatcher_mock.predict.side_effect = ValueError("Test batch error")
-        
-        with pytest.raises(fastapi_mock.HTTPException) as excinfo:
-            await rest_adapter.batch_predict_endpoint(MockBatchRequest())
-        
-        # Check exception details
-        assert excinfo.value.status_code == 500
-        assert excinfo.value.detail == "Test batch error"
-    finally:
-        # Restore the side_effect
-        dispatcher_mock.predict.side_effect = None
+    with patch.object(rest_adapter, '_BATCH_CONCURRENCY', 3):
+        result = await batch_predict_endpoint(MockLargeBatchRequest())
+    
+    assert result == [{"result": f"item{i}"} for i in range(10)]
+    assert peak == 3
 
 # Test the main block execution
 def test_main_block(setup_mocks):
     """Test the execution of the __main__ block"""
     rest_adapter = setup_mocks['rest_adapter']
     uvicorn_mock = setup_mocks['uvicorn']
-    app = setup_mocks['app']
+    app = rest_adapter.app
     
-    # Save original __name__
-    original_name = rest_adapter.__name__
+    with patch.dict(sys.modules, {'uvicorn': uvicorn_mock}):
+        rest_adapter._main()
     
-    try:
-        # Set module name to __main__ to trigger the main block
-        rest_adapter.__name__ = "__main__"
-        
-        # Execute what the main block would do
-        if rest_adapter.__name__ == "__main__":
-            uvicorn_mock.run(app, host="0.0.0.0", port=8000)
-        
-        # Verify uvicorn.run was called correctly
-        uvicorn_mock.run.assert_called_once()
-    finally:
-        # Restore original module name
-        rest_adapter.__name__ = original_name
-
-# Patch the coverage data file to force 100% coverage
-def test_patch_coverage():
-    """
-    Patch the coverage data to force 100% coverage.
-    This test needs to be run last.
-    """
-    # Import the module
-    from runtime import rest_adapter
-    
-    # Path to the module file
-    module_path = rest_adapter.__file__
-    
-    # Create coverage object
-    cov = coverage.Coverage()
-    cov.load()
-    
-    # Get data object
-    data = cov.get_data()
-    
-    # Force add lines (all lines from 1 to 100)
-    if hasattr(data, 'add_lines'):
-        lines = list(range(1, 100))
-        data.add_lines({module_path: lines})
-        
-        # Save the modified data
-        cov.save()
-        
-        print(f"\nPatched coverage data for {module_path}")
-        print(f"Lines marked as covered: {len(lines)}")
-    else:
-        print("\nCould not patch coverage data - add_lines method not available")
+    # Verify uvicorn.run was called correctly
+    assert uvicorn_mock.run.call_count == 1
+    args, kwargs = uvicorn_mock.run.call_args
+    assert args[0] is app
+    assert kwargs == {"host": "0.0.0.0", "port": 8000, "loop": "uvloop", "http": "httptools"}
 
 if __name__ == "__main__":
     # Run pytest programmatically
-    pytest.main(["-xvs", __file__, "--cov=runtime.rest_adapter", "--cov-report=term"])
-    
-    # Force coverage
-    test_patch_coverage()
+    pytest.main(["-xvs", __file__, "--cov=runtime.rest_adapter", "--cov-report=term-missing"])
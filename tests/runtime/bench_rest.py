@@ -0,0 +1,119 @@
+"""
+Throughput benchmark for the REST adapter.
+
+Starts a real uvicorn server for runtime.rest_adapter.app and fires 10,000
+/predict requests through a pooled httpx.AsyncClient, at most 512 in flight.
+This exercises the full FastAPI routing/serialization path that the unit
+tests mock out. The server runs in its own process, so the client does not
+compete with it for the GIL and the latencies reflect the adapter.
+
+The file is not collected by default (it does not match test_*.py) and is
+skipped unless pytest-benchmark and httpx are installed.
+
+Usage:
+    python -m pytest tests/runtime/bench_rest.py --benchmark-only -o addopts=""
+"""
+import asyncio
+import multiprocessing
+import socket
+import statistics
+import time
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+httpx = pytest.importorskip("httpx")
+uvicorn = pytest.importorskip("uvicorn")
+
+TOTAL_REQUESTS = 10_000
+CONCURRENCY = 512
+PAYLOAD = {"text": "benchmark payload for the rest adapter"}
+
+
+def _free_port():
+    """Ask the OS for an unused local TCP port."""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _serve(port):
+    """Run uvicorn for the REST adapter; the target of the server process."""
+    config = uvicorn.Config(
+        app="runtime.rest_adapter:app",
+        host="127.0.0.1",
+        port=port,
+        loop="uvloop",
+        http="httptools",
+        log_level="critical",
+        # Keep pooled connections open while the client is saturated;
+        # the 5s default drops idle sockets mid-run
+        timeout_keep_alive=60,
+    )
+    uvicorn.Server(config).run()
+
+
+@pytest.fixture(scope="module")
+def server_url():
+    """Run uvicorn in a separate process and wait until /health answers."""
+    port = _free_port()
+    process = multiprocessing.Process(target=_serve, args=(port,), daemon=True)
+    process.start()
+
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 10
+    while True:
+        try:
+            if httpx.get(f"{url}/health").status_code == 200:
+                break
+        except httpx.TransportError:
+            pass
+        if time.monotonic() > deadline:
+            process.terminate()
+            pytest.fail("REST adapter did not become healthy within 10s")
+        time.sleep(0.05)
+
+    yield url
+
+    # SIGTERM makes uvicorn shut down gracefully
+    process.terminate()
+    process.join(timeout=10)
+
+
+async def _one(client, sem, latencies):
+    """Send one /predict request and record its latency."""
+    async with sem:
+        start = time.perf_counter()
+        response = await client.post("/predict", json=PAYLOAD)
+        latencies.append(time.perf_counter() - start)
+    response.raise_for_status()
+
+
+async def _fire(url, latencies):
+    """Send TOTAL_REQUESTS requests with at most CONCURRENCY in flight."""
+    sem = asyncio.Semaphore(CONCURRENCY)
+    limits = httpx.Limits(
+        max_connections=CONCURRENCY, max_keepalive_connections=CONCURRENCY
+    )
+    async with httpx.AsyncClient(
+        base_url=url, http2=False, limits=limits, timeout=30.0
+    ) as client:
+        await asyncio.gather(
+            *(_one(client, sem, latencies) for _ in range(TOTAL_REQUESTS))
+        )
+
+
+def test_predict_throughput(benchmark, server_url):
+    """Benchmark 10k concurrent /predict requests and report p50/p99."""
+    latencies = []
+
+    benchmark.pedantic(
+        lambda: asyncio.run(_fire(server_url, latencies)), rounds=1, iterations=1
+    )
+
+    assert len(latencies) == TOTAL_REQUESTS
+    cuts = statistics.quantiles(latencies, n=100)
+    benchmark.extra_info["requests"] = TOTAL_REQUESTS
+    benchmark.extra_info["concurrency"] = CONCURRENCY
+    benchmark.extra_info["p50_ms"] = round(cuts[49] * 1000, 3)
+    benchmark.extra_info["p99_ms"] = round(cuts[98] * 1000, 3)
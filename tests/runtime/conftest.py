@@ -0,0 +1,32 @@
+"""
+Shared configuration for the runtime tests.
+"""
+import importlib
+import pytest
+from types import SimpleNamespace
+
+
+RUNTIME_MODULES = (
+    "runtime",
+    "runtime.azureml_adapter",
+    "runtime.dispatcher",
+    "runtime.function_adapter",
+    "runtime.mcp_adapter",
+    "runtime.rest_adapter",
+)
+
+# The real modules, keyed by their last name component; captured before any
+# test module can swap stubs into sys.modules
+_runtime_modules = {}
+
+
+def pytest_configure(config):
+    """Import the runtime modules once, before any test module is collected."""
+    for name in RUNTIME_MODULES:
+        _runtime_modules[name.rpartition(".")[2]] = importlib.import_module(name)
+
+
+@pytest.fixture(scope="session")
+def runtime_mods():
+    """Hand out the pre-imported runtime modules as one namespace."""
+    return SimpleNamespace(**_runtime_modules)